@@ -2,8 +2,9 @@ from __future__ import annotations
 
 import argparse
 import logging
+import signal
 import sys
-import time
+import threading
 from pathlib import Path
 
 from prometheus_client import CollectorRegistry, start_http_server
@@ -58,14 +59,50 @@ def main() -> None:
 	level = args.log_level or config.log_level
 	apply_log_level(level)
 	registry = CollectorRegistry()
-	registry.register(FritzMetricCollector(config.devices))
+	collector = FritzMetricCollector(config.devices)
+	registry.register(collector)
 	logger.info("starting exporter on %s:%s", _LISTEN_ADDRESS, config.exporter_port)
 	start_http_server(config.exporter_port, _LISTEN_ADDRESS, registry)
+
+	stop = threading.Event()
+
+	def _reload(*_: object) -> None:
+		# Runs as a signal handler on the main thread: an escaping exception
+		# would unwind stop.wait() and take the exporter down.
+		try:
+			_reload_config(logger, collector, config_path, config.exporter_port, args.log_level)
+		except Exception:
+			logger.exception("configuration reload failed, keeping current settings")
+
+	signal.signal(signal.SIGTERM, lambda *_: stop.set())
+	signal.signal(signal.SIGINT, lambda *_: stop.set())
+	if hasattr(signal, "SIGHUP"):
+		signal.signal(signal.SIGHUP, _reload)
+	stop.wait()
+	logger.info("shutting down")
+
+
+def _reload_config(
+	logger: logging.Logger,
+	collector: FritzMetricCollector,
+	config_path: str | None,
+	exporter_port: int,
+	log_level_override: str | None,
+) -> None:
+	logger.info("reloading configuration")
 	try:
-		while True:
-			time.sleep(60)
-	except KeyboardInterrupt:
-		logger.info("shutting down")
+		config = load_config(config_path)
+	except ConfigError as exc:
+		logger.error("configuration reload failed, keeping current settings: %s", exc)
+		return
+	if config.exporter_port != exporter_port:
+		logger.warning(
+			"exporter_port change to %s requires a restart; still serving on %s",
+			config.exporter_port,
+			exporter_port,
+		)
+	apply_log_level(log_level_override or config.log_level)
+	collector.update_devices(config.devices)
 
 
 if __name__ == "__main__":
@@ -1,19 +1,20 @@
 from __future__ import annotations
 
+import contextlib
+import json
 import logging
 import os
+import tempfile
 from dataclasses import dataclass
 from pathlib import Path
 from typing import Iterable
 
-import yaml
-
 
 class ConfigError(RuntimeError):
 	"""Raised when configuration cannot be loaded."""
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DeviceConfig:
 	hostname: str
 	username: str
@@ -21,33 +22,136 @@ class DeviceConfig:
 	name: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class ExporterConfig:
 	exporter_port: int
 	log_level: str
 	devices: tuple[DeviceConfig, ...]
 
 
-_LOG_LEVELS = {"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"}
+_LOG_LEVELS = frozenset({"DEBUG", "INFO", "WARNING", "ERROR", "CRITICAL"})
+# Built configs keyed by (path, mtime_ns, size); instances are frozen and safe to share.
+# Each entry also records the stat of every password_file it read, since the
+# config embeds their contents and must be rebuilt when a secret rotates.
+_FileStamp = tuple[str, int | None, int | None]
+_CONFIG_CACHE: dict[tuple[str, int, int], tuple[ExporterConfig, tuple[_FileStamp, ...]]] = {}
+_JSON_CACHE_SUFFIX = ".cache.json"
+
+logger = logging.getLogger("fritzexporter")
 
 
 def load_config(path: str | None) -> ExporterConfig:
-	if path:
-		data = _load_from_file(path)
-	else:
-		data = _load_from_env()
-	return _build_config(data)
+	try:
+		return _load_config(path)
+	except ConfigError:
+		raise
+	except (OSError, ValueError, TypeError, AttributeError) as exc:
+		# Malformed values (e.g. a non-numeric port, a device that is not a
+		# mapping, an unreadable password_file) surface as ConfigError too.
+		msg = f"invalid configuration: {exc}"
+		raise ConfigError(msg) from exc
+
+
+def _load_config(path: str | None) -> ExporterConfig:
+	if not path:
+		return _build_config(_load_from_env())
+	try:
+		stat = os.stat(path)
+	except OSError as exc:
+		msg = f"configuration file '{path}' cannot be read: {exc}"
+		raise ConfigError(msg) from exc
+	key = (path, stat.st_mtime_ns, stat.st_size)
+	cached = _CONFIG_CACHE.get(key)
+	if cached is not None:
+		config, password_stamps = cached
+		if _file_stamps(stamp[0] for stamp in password_stamps) == password_stamps:
+			return config
+	data = _load_from_file(path)
+	config = _build_config(data)
+	_CONFIG_CACHE.clear()
+	_CONFIG_CACHE[key] = (config, _file_stamps(_password_files(data)))
+	return config
+
+
+def _password_files(raw: dict) -> list[str]:
+	return [
+		str(device["password_file"])
+		for device in _ensure_iterable(raw.get("devices", []))
+		if device.get("password_file")
+	]
+
+
+def _file_stamps(paths: Iterable[str]) -> tuple[_FileStamp, ...]:
+	stamps: list[_FileStamp] = []
+	for path in paths:
+		try:
+			stat = os.stat(path)
+		except OSError:
+			stamps.append((path, None, None))
+			continue
+		stamps.append((path, stat.st_mtime_ns, stat.st_size))
+	return tuple(stamps)
 
 
 def _load_from_file(path: str) -> dict:
-	with Path(path).open("r", encoding="utf-8") as handle:
-		loaded = yaml.safe_load(handle)
+	cache_path = path + _JSON_CACHE_SUFFIX
+	stat = os.stat(path)
+	mtime_ns, size = stat.st_mtime_ns, stat.st_size
+	cached = _read_json_cache(cache_path, mtime_ns, size)
+	if cached is not None:
+		return cached
+	# Imported here so a warm JSON cache or env-only config never loads PyYAML.
+	import yaml
+
+	# Prefer the LibYAML-backed loader when PyYAML was built against it.
+	loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+	try:
+		with Path(path).open("rb") as handle:
+			loaded = yaml.load(handle, Loader=loader)
+	except yaml.YAMLError as exc:
+		msg = f"configuration file '{path}' is not valid YAML: {exc}"
+		raise ConfigError(msg) from exc
 	if loaded is None:
 		msg = f"configuration file '{path}' is empty"
 		raise ConfigError(msg)
+	_write_json_cache(cache_path, mtime_ns, size, loaded)
 	return loaded
 
 
+def _read_json_cache(cache_path: str, mtime_ns: int, size: int) -> dict | None:
+	try:
+		with Path(cache_path).open("rb") as handle:
+			blob = json.load(handle)
+	except (OSError, ValueError):
+		return None
+	# Size guards against same-tick edits on filesystems with coarse mtimes.
+	if not isinstance(blob, dict):
+		return None
+	if blob.get("mtime_ns") != mtime_ns or blob.get("size") != size:
+		return None
+	data = blob.get("data")
+	return data if isinstance(data, dict) else None
+
+
+def _write_json_cache(cache_path: str, mtime_ns: int, size: int, data: dict) -> None:
+	# Best effort: the config directory may be read-only or the YAML may hold
+	# values JSON cannot represent; either way the YAML stays authoritative.
+	directory = os.path.dirname(cache_path) or "."
+	try:
+		fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".fritz-", suffix=".tmp")
+	except OSError as exc:
+		logger.debug("skipping config cache %s: %s", cache_path, exc)
+		return
+	try:
+		with os.fdopen(fd, "w", encoding="utf-8") as handle:
+			json.dump({"mtime_ns": mtime_ns, "size": size, "data": data}, handle)
+		os.replace(tmp_path, cache_path)
+	except (OSError, TypeError, ValueError) as exc:
+		logger.debug("skipping config cache %s: %s", cache_path, exc)
+		with contextlib.suppress(OSError):
+			os.unlink(tmp_path)
+
+
 def _load_from_env() -> dict:
 	required = ("FRITZ_USERNAME",)
 	if any(not os.getenv(key) for key in required):
@@ -74,7 +178,8 @@ def _load_from_env() -> dict:
 
 def _build_config(raw: dict) -> ExporterConfig:
 	exporter_port = int(raw.get("exporter_port", 18000))
-	log_level = str(raw.get("log_level", "INFO")).upper()
+	raw_level = raw.get("log_level")
+	log_level = raw_level.upper() if isinstance(raw_level, str) else "INFO"
 	if log_level not in _LOG_LEVELS:
 		log_level = "INFO"
 	devices_raw = raw.get("devices", [])
@@ -1,15 +1,12 @@
 from __future__ import annotations
 
 import logging
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from dataclasses import dataclass
+from typing import TYPE_CHECKING
 
-from fritzconnection import FritzConnection
-from fritzconnection.core.exceptions import (
-    FritzActionError,
-    FritzConnectionException,
-    FritzServiceError,
-)
 from prometheus_client.core import (
     CounterMetricFamily,
     GaugeMetricFamily,
@@ -17,16 +14,44 @@ from prometheus_client.core import (
 
 from .config import DeviceConfig
 
+if TYPE_CHECKING:
+    # fritzconnection pulls in requests and the XML stack; it is imported
+    # lazily where connections are made and calls are issued.
+    from fritzconnection import FritzConnection
+
 logger = logging.getLogger("fritzexporter")
 
+_MAX_DEVICE_WORKERS = 8
+# Concurrent TR-064 calls per device.
+_MAX_CALL_WORKERS = 3
+_CONNECTION_MAX_AGE_SECONDS = 3600.0
+# DeviceMetrics fields in bit order of the missing-field mask in _log_device_metrics.
+_METRIC_FIELDS = (
+    "dsl_status",
+    "ppp_state",
+    "byte_rates",
+    "byte_totals",
+    "connection_uptime",
+)
+
+# Connections that failed at transport level during the current scrape.
+_stale_connections: set[FritzConnection] = set()
+_stale_connections_lock = threading.Lock()
 
-@dataclass(frozen=True)
+# Successful responses keyed by (address, service, action), so back-to-back
+# scrapes within the TTL do not repeat the SOAP round-trip.
+_CALL_CACHE_TTL_SECONDS = 2.0
+_CALL_CACHE: dict[tuple[str, str, str], tuple[float, dict]] = {}
+_call_cache_lock = threading.Lock()
+
+
+@dataclass(frozen=True, slots=True)
 class PPPState:
     value: int
     last_error: str
 
 
-@dataclass(frozen=True)
+@dataclass(frozen=True, slots=True)
 class DeviceMetrics:
     dsl_status: int | None
     ppp_state: PPPState | None
@@ -36,66 +61,72 @@ class DeviceMetrics:
 
 
 class FritzMetricCollector:
+    # (name, documentation, label names) for each family built per scrape.
+    _DSL_METRIC = ("fritz_dsl_status", "DSL status (1=up, 0=down)", ("friendly_name",))
+    _PPP_METRIC = (
+        "fritz_ppp_connection_state",
+        "PPP connection state (1=connected, 0=disconnected)",
+        ("friendly_name", "last_error"),
+    )
+    _DATARATE_METRIC = (
+        "fritz_wan_datarate_bytes",
+        "Current WAN data rate in bytes per second",
+        ("friendly_name", "direction"),
+    )
+    _DATA_TOTAL_METRIC = (
+        "fritz_wan_data_bytes_total",
+        "Total WAN data transferred in bytes",
+        ("friendly_name", "direction"),
+    )
+    _CONNECTION_UPTIME_METRIC = (
+        "fritz_wan_connection_uptime_seconds",
+        "Seconds since WAN connection established",
+        ("friendly_name",),
+    )
+
     def __init__(self, devices: tuple[DeviceConfig, ...]) -> None:
         self._devices = devices
+        self._label_cache = _build_label_cache(devices)
+        self._connections: dict[str, tuple[FritzConnection, float]] = {}
+
+    def update_devices(self, devices: tuple[DeviceConfig, ...]) -> None:
+        # Keep cached connections only for devices whose settings are unchanged.
+        unchanged = {device.hostname for device in devices if device in self._devices}
+        for hostname in list(self._connections):
+            if hostname not in unchanged:
+                self._connections.pop(hostname, None)
+        self._label_cache = _build_label_cache(devices)
+        self._devices = devices
 
     def collect(self):
         logger.debug("starting metric collection for %d device(s)", len(self._devices))
-        dsl_metric = GaugeMetricFamily(
-            "fritz_dsl_status",
-            "DSL status (1=up, 0=down)",
-            labels=["friendly_name"],
-        )
-        ppp_metric = GaugeMetricFamily(
-            "fritz_ppp_connection_state",
-            "PPP connection state (1=connected, 0=disconnected)",
-            labels=["friendly_name", "last_error"],
-        )
-        datarate_metric = GaugeMetricFamily(
-            "fritz_wan_datarate_bytes",
-            "Current WAN data rate in bytes per second",
-            labels=["friendly_name", "direction"],
-        )
-        data_total_metric = CounterMetricFamily(
-            "fritz_wan_data_bytes_total",
-            "Total WAN data transferred in bytes",
-            labels=["friendly_name", "direction"],
-        )
-        connection_uptime_seconds_metric = GaugeMetricFamily(
-            "fritz_wan_connection_uptime_seconds",
-            "Seconds since WAN connection established",
-            labels=["friendly_name"],
+        label_cache = self._label_cache
+        dsl_metric = _new_family(GaugeMetricFamily, self._DSL_METRIC)
+        ppp_metric = _new_family(GaugeMetricFamily, self._PPP_METRIC)
+        datarate_metric = _new_family(GaugeMetricFamily, self._DATARATE_METRIC)
+        data_total_metric = _new_family(CounterMetricFamily, self._DATA_TOTAL_METRIC)
+        connection_uptime_seconds_metric = _new_family(
+            GaugeMetricFamily, self._CONNECTION_UPTIME_METRIC
         )
 
-        for device in self._devices:
-            connection = self._connect(device)
-            if connection is None:
-                logger.warning("skipping device %s - connection unavailable", device.name)
-                continue
-            collection_start = time.monotonic()
-            metrics = _gather_device_metrics(connection)
-            collection_ms = (time.monotonic() - collection_start) * 1000.0
-            _log_device_metrics(device, metrics, collection_ms)
+        for device, metrics in self._collect_devices():
+            labels = label_cache.get(device.name) or _device_labels(device.name)
             if metrics.dsl_status is not None:
-                dsl_metric.add_metric([device.name], metrics.dsl_status)
+                dsl_metric.add_metric(labels["bare"], metrics.dsl_status)
             if metrics.ppp_state is not None:
                 ppp_metric.add_metric(
-                    [device.name, metrics.ppp_state.last_error],
+                    (device.name, metrics.ppp_state.last_error),
                     metrics.ppp_state.value,
                 )
             if metrics.byte_rates is not None:
-                datarate_metric.add_metric([device.name, "rx"], metrics.byte_rates[0])
-                datarate_metric.add_metric([device.name, "tx"], metrics.byte_rates[1])
+                datarate_metric.add_metric(labels["rx"], metrics.byte_rates[0])
+                datarate_metric.add_metric(labels["tx"], metrics.byte_rates[1])
             if metrics.byte_totals is not None:
-                data_total_metric.add_metric(
-                    [device.name, "rx"], metrics.byte_totals[0]
-                )
-                data_total_metric.add_metric(
-                    [device.name, "tx"], metrics.byte_totals[1]
-                )
+                data_total_metric.add_metric(labels["rx"], metrics.byte_totals[0])
+                data_total_metric.add_metric(labels["tx"], metrics.byte_totals[1])
             if metrics.connection_uptime is not None:
                 connection_uptime_seconds_metric.add_metric(
-                    [device.name], metrics.connection_uptime
+                    labels["bare"], metrics.connection_uptime
                 )
 
         for metric_family in (
@@ -108,7 +139,49 @@ class FritzMetricCollector:
             if metric_family.samples:
                 yield metric_family
 
+    def _collect_devices(self) -> list[tuple[DeviceConfig, DeviceMetrics]]:
+        # Devices are queried concurrently; metric families are filled in by the
+        # caller on the scrape thread since they are not safe to mutate in parallel.
+        devices = self._devices
+        if len(devices) == 1:
+            results = [self._collect_device(devices[0])]
+        else:
+            workers = min(_MAX_DEVICE_WORKERS, len(devices))
+            with ThreadPoolExecutor(
+                max_workers=workers, thread_name_prefix="fritz-device"
+            ) as pool:
+                results = list(pool.map(self._collect_device, devices))
+        return [
+            (device, metrics)
+            for device, metrics in zip(devices, results)
+            if metrics is not None
+        ]
+
+    def _collect_device(self, device: DeviceConfig) -> DeviceMetrics | None:
+        connection = self._connect(device)
+        if connection is None:
+            logger.warning("skipping device %s - connection unavailable", device.name)
+            return None
+        collection_start = time.monotonic()
+        metrics = _gather_device_metrics(connection)
+        collection_ms = (time.monotonic() - collection_start) * 1000.0
+        if _pop_stale_connection(connection):
+            logger.info("dropping cached connection | device=%s", device.name)
+            self._connections.pop(device.hostname, None)
+        _log_device_metrics(device, metrics, collection_ms)
+        return metrics
+
     def _connect(self, device: DeviceConfig) -> FritzConnection | None:
+        from fritzconnection import FritzConnection
+        from fritzconnection.core.exceptions import FritzConnectionException
+
+        cached = self._connections.get(device.hostname)
+        if cached is not None:
+            connection, connected_at = cached
+            if time.monotonic() - connected_at < _CONNECTION_MAX_AGE_SECONDS:
+                return connection
+            logger.debug("cached connection expired | device=%s", device.name)
+            self._connections.pop(device.hostname, None)
         start = time.monotonic()
         try:
             connection = FritzConnection(
@@ -123,8 +196,9 @@ class FritzMetricCollector:
                 device.hostname,
                 duration_ms,
             )
+            self._connections[device.hostname] = (connection, time.monotonic())
             return connection
-        except FritzConnectionException:
+        except (FritzConnectionException, OSError):
             duration_ms = (time.monotonic() - start) * 1000.0
             logger.exception(
                 "failed to connect to %s | connect_ms=%.1f",
@@ -134,22 +208,38 @@ class FritzMetricCollector:
             return None
 
 
+def _new_family(family_type, spec: tuple[str, str, tuple[str, ...]]):
+    name, documentation, labels = spec
+    return family_type(name, documentation, labels=labels)
+
+
+def _build_label_cache(
+    devices: tuple[DeviceConfig, ...],
+) -> dict[str, dict[str, tuple[str, ...]]]:
+    return {device.name: _device_labels(device.name) for device in devices}
+
+
+def _device_labels(name: str) -> dict[str, tuple[str, ...]]:
+    return {"rx": (name, "rx"), "tx": (name, "tx"), "bare": (name,)}
+
+
 def _log_device_metrics(
     device: DeviceConfig, metrics: DeviceMetrics, collection_ms: float
 ) -> None:
-    missing_fields = []
-    if metrics.dsl_status is None:
-        missing_fields.append("dsl_status")
-    if metrics.ppp_state is None:
-        missing_fields.append("ppp_state")
-    if metrics.byte_rates is None:
-        missing_fields.append("byte_rates")
-    if metrics.byte_totals is None:
-        missing_fields.append("byte_totals")
-    if metrics.connection_uptime is None:
-        missing_fields.append("connection_uptime")
-
-    if missing_fields:
+    missing_mask = (
+        (metrics.dsl_status is None)
+        | (metrics.ppp_state is None) << 1
+        | (metrics.byte_rates is None) << 2
+        | (metrics.byte_totals is None) << 3
+        | (metrics.connection_uptime is None) << 4
+    )
+
+    if missing_mask:
+        missing_fields = [
+            field
+            for bit, field in enumerate(_METRIC_FIELDS)
+            if missing_mask & (1 << bit)
+        ]
         logger.warning(
             "partial metrics collected | device=%s duration_ms=%.1f missing=%s",
             device.name,
@@ -191,13 +281,18 @@ def _get_dsl_status(connection: FritzConnection) -> int | None:
     return 1 if response.get("NewStatus") == "Up" else 0
 
 
-def _get_ppp_state(connection: FritzConnection) -> PPPState | None:
-    response = _safe_call(connection, "WANPPPConnection1", "GetStatusInfo")
+def _get_ppp_info(connection: FritzConnection) -> tuple[PPPState | None, int | None]:
+    # GetInfo carries both the connection state and the uptime, so a single
+    # round-trip replaces the separate GetStatusInfo call.
+    response = _safe_call(connection, "WANPPPConnection1", "GetInfo")
     if response is None:
-        return None
+        return None, None
     state = 1 if response.get("NewConnectionStatus") == "Connected" else 0
     last_error = response.get("NewLastConnectionError", "")
-    return PPPState(state, last_error)
+    uptime = _coerce_int(response.get("NewUptime"))
+    if uptime is not None:
+        uptime = max(uptime, 0)
+    return PPPState(state, last_error), uptime
 
 
 def _get_wan_transfer_metrics(
@@ -217,30 +312,40 @@ def _get_wan_transfer_metrics(
     return rates, totals
 
 
-def _get_connection_uptime(connection: FritzConnection) -> int | None:
-    response = _safe_call(connection, "WANPPPConnection1", "GetInfo")
-    if response is None:
-        return None
-    uptime = _coerce_int(response.get("NewUptime"))
-    if uptime is None:
-        return None
-    return max(uptime, 0)
-
-
 def _gather_device_metrics(connection: FritzConnection) -> DeviceMetrics:
-    connection_uptime = _get_connection_uptime(connection)
-    byte_rates, byte_totals = _get_wan_transfer_metrics(connection)
-    return DeviceMetrics(
-        dsl_status=_get_dsl_status(connection),
-        ppp_state=_get_ppp_state(connection),
-        byte_rates=byte_rates,
-        byte_totals=byte_totals,
-        connection_uptime=connection_uptime,
-    )
+    # The TR-064 calls are independent round-trips, so issue them concurrently.
+    with ThreadPoolExecutor(
+        max_workers=_MAX_CALL_WORKERS, thread_name_prefix="fritz-call"
+    ) as pool:
+        ppp_future = pool.submit(_get_ppp_info, connection)
+        transfer_future = pool.submit(_get_wan_transfer_metrics, connection)
+        dsl_future = pool.submit(_get_dsl_status, connection)
+        ppp_state, connection_uptime = ppp_future.result()
+        byte_rates, byte_totals = transfer_future.result()
+        return DeviceMetrics(
+            dsl_status=dsl_future.result(),
+            ppp_state=ppp_state,
+            byte_rates=byte_rates,
+            byte_totals=byte_totals,
+            connection_uptime=connection_uptime,
+        )
 
 
 def _safe_call(connection: FritzConnection, service: str, action: str) -> dict | None:
+    from fritzconnection.core.exceptions import FritzConnectionException
+
+    key = (connection.address, service, action)
     start = time.monotonic()
+    with _call_cache_lock:
+        cached = _CALL_CACHE.get(key)
+    if cached is not None and start - cached[0] < _CALL_CACHE_TTL_SECONDS:
+        logger.debug(
+            "%s.%s served from cache | age_ms=%.1f",
+            service,
+            action,
+            (start - cached[0]) * 1000.0,
+        )
+        return cached[1]
     try:
         result = connection.call_action(service, action)
         duration_ms = (time.monotonic() - start) * 1000.0
@@ -250,8 +355,10 @@ def _safe_call(connection: FritzConnection, service: str, action: str) -> dict |
             action,
             duration_ms,
         )
+        with _call_cache_lock:
+            _CALL_CACHE[key] = (time.monotonic(), result)
         return result
-    except (FritzActionError, FritzServiceError, FritzConnectionException) as exc:
+    except (FritzConnectionException, OSError) as exc:
         duration_ms = (time.monotonic() - start) * 1000.0
         logger.warning(
             "%s.%s call failed after %.1f ms: %s",
@@ -260,9 +367,24 @@ def _safe_call(connection: FritzConnection, service: str, action: str) -> dict |
             duration_ms,
             exc,
         )
+        # Only transport failures invalidate the connection: OSError (requests
+        # exceptions derive from it) or the bare base class fritzconnection
+        # raises for unparsable responses. Subclasses are SOAP faults the router
+        # returned deliberately, so the connection itself is still good.
+        if isinstance(exc, OSError) or type(exc) is FritzConnectionException:
+            with _stale_connections_lock:
+                _stale_connections.add(connection)
         return None
 
 
+def _pop_stale_connection(connection: FritzConnection) -> bool:
+    with _stale_connections_lock:
+        if connection in _stale_connections:
+            _stale_connections.discard(connection)
+            return True
+        return False
+
+
 def _coerce_int(value: int | float | str | None) -> int | None:
     if value is None:
         return None
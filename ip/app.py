@@ -10,9 +10,13 @@ Workflow summary:
 -----------------
 1. Five external providers are used to determine the public IPv4 address:
        ipapi.co, ipwho.is, ifconfig.co, api.ip.sb, ipinfo.io
-   The provider list is randomized per request to spread load.
 
-2. Each provider is queried sequentially until one passes **all validation checks**:
+2. On every cache refresh all providers are queried concurrently; the first
+   response that passes **all validation checks** wins and the remaining
+   requests are abandoned. Each provider therefore receives every refresh; this
+   extra load (at most one request per provider per 30s cache window) is accepted
+   in exchange for latency. The submission order is shuffled, which only changes
+   which provider is sent first, not how many are contacted. Validation checks:
        - HTTP status code == 200
        - Content-Type starts with "application/json"
        - Body parses as valid JSON and is a dictionary
@@ -21,23 +25,32 @@ Workflow summary:
 
 3. Once a valid IP is retrieved:
        - The country code (provider-specific key) is extracted and normalized.
-       - The service pings that IP using Linux `ping -4 -c 1 -w 2` and extracts latency in ms.
+       - The service sends a single ICMP echo request to that IP (unprivileged ICMP
+         datagram socket, falling back to a raw socket with CAP_NET_RAW) and measures
+         the round-trip time in ms; replies are awaited for up to 2 seconds.
        - If ping fails, latency = 0.0.
 
 4. If all providers fail, the service returns HTTP 502 (no data).
 
-5. Only `flask` and `requests` are required (standard library otherwise).
+5. Only `flask`, `requests`, `orjson`, `waitress` and `prometheus_client` are required
+   (standard library otherwise). The app is served by waitress with a small thread pool.
    The script is IPv4-only, designed for Linux-based Docker environments.
 """
 
 import logging
+import orjson
+import os
 import random
 import requests
-import subprocess
-import re
-import ipaddress
+import socket
+import struct
 import time
+import types
+from concurrent.futures import ThreadPoolExecutor, as_completed
 from flask import Flask, jsonify, Response
+from prometheus_client import CONTENT_TYPE_LATEST, CollectorRegistry, generate_latest
+from prometheus_client.core import GaugeMetricFamily
+from waitress import serve
 
 app = Flask(__name__)
 session = requests.Session()
@@ -49,17 +62,26 @@ logging.basicConfig(
 logger = logging.getLogger("ip_exporter")
 
 HTTP_TIMEOUT = 5  # seconds
+SERVER_THREADS = 4
+PING_TIMEOUT = 2.0  # seconds
 CACHE_TTL_SECONDS = 30.0
 
 _ip_cache_data = None
 _ip_cache_timestamp = 0.0
 
+# ICMP echo header (type, code, checksum, identifier, sequence), compiled once.
+_ICMP_HEADER = struct.Struct("!BBHHH")
+_ICMP_PAYLOAD = b"olis-dashboard-ping"
+# Echo packets have a fixed length, so the 16-bit word layout used for the
+# checksum is compiled once as well (odd lengths are zero-padded).
+_ICMP_WORDS = struct.Struct(f"!{(_ICMP_HEADER.size + len(_ICMP_PAYLOAD) + 1) // 2}H")
+
 
 def is_valid_ipv4(ip_str: str) -> bool:
     try:
-        ip = ipaddress.ip_address(ip_str)
-        return ip.version == 4
-    except Exception:
+        socket.inet_pton(socket.AF_INET, ip_str)
+        return True
+    except (OSError, ValueError):
         return False
 
 
@@ -87,7 +109,7 @@ def get_json(provider: str, url: str):
             )
             return None
 
-        data = r.json()
+        data = orjson.loads(r.content)
         if not isinstance(data, dict):
             logger.warning("provider=%s payload is not a dict", provider)
             return None
@@ -105,7 +127,7 @@ def get_json(provider: str, url: str):
             payload_bytes,
         )
         return data, elapsed_ms, payload_bytes
-    except (requests.RequestException, ValueError) as exc:
+    except (requests.RequestException, orjson.JSONDecodeError, ValueError) as exc:
         elapsed_ms = (time.monotonic() - start) * 1000.0
         logger.warning(
             "provider=%s request failed latency_ms=%.1f error=%s",
@@ -116,20 +138,61 @@ def get_json(provider: str, url: str):
         return None
 
 
+def _icmp_checksum(packet: bytes) -> int:
+    total = sum(_ICMP_WORDS.unpack(packet.ljust(_ICMP_WORDS.size, b"\x00")))
+    total = (total >> 16) + (total & 0xFFFF)
+    total += total >> 16
+    return ~total & 0xFFFF
+
+
+def _open_icmp_socket():
+    # Unprivileged ICMP datagram sockets need net.ipv4.ping_group_range (the
+    # Docker default); fall back to a raw socket, which needs CAP_NET_RAW.
+    try:
+        return socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_ICMP), False
+    except OSError:
+        return socket.socket(socket.AF_INET, socket.SOCK_RAW, socket.IPPROTO_ICMP), True
+
+
+def _icmp_echo(ip: str, timeout: float):
+    ident = os.getpid() & 0xFFFF
+    seq = random.randint(0, 0xFFFF)
+    header = _ICMP_HEADER.pack(8, 0, 0, ident, seq)
+    checksum = _icmp_checksum(header + _ICMP_PAYLOAD)
+    packet = _ICMP_HEADER.pack(8, 0, checksum, ident, seq) + _ICMP_PAYLOAD
+
+    sock, is_raw = _open_icmp_socket()
+    with sock:
+        start = time.perf_counter_ns()
+        deadline = start + int(timeout * 1e9)
+        sock.sendto(packet, (ip, 0))
+        while True:
+            remaining = (deadline - time.perf_counter_ns()) / 1e9
+            if remaining <= 0:
+                return None
+            sock.settimeout(remaining)
+            try:
+                reply, _ = sock.recvfrom(1024)
+            except socket.timeout:
+                return None
+            elapsed_ns = time.perf_counter_ns() - start
+            # Raw sockets deliver the IP header; datagram sockets strip it and
+            # the kernel rewrites the identifier, so only match it on raw.
+            offset = (reply[0] & 0x0F) * 4 if is_raw else 0
+            if len(reply) < offset + _ICMP_HEADER.size:
+                continue
+            r_type, _, _, r_ident, r_seq = _ICMP_HEADER.unpack_from(reply, offset)
+            if r_type == 0 and r_seq == seq and (not is_raw or r_ident == ident):
+                return elapsed_ns / 1e6
+
+
 def ping_ip(ip: str):
     try:
-        out = subprocess.run(
-            ["ping", "-4", "-c", "1", "-w", "2", ip],
-            capture_output=True,
-            text=True,
-            timeout=3
-        ).stdout
-        m = re.search(r"time[=<]?\s*([\d.]+)\s*ms", out)
-        if m:
-            latency = float(m.group(1))
+        latency = _icmp_echo(ip, PING_TIMEOUT)
+        if latency is not None:
             logger.info("ping successful ip=%s latency_ms=%.2f", ip, latency)
             return latency
-        logger.warning("ping output missing latency ip=%s", ip)
+        logger.warning("ping timed out ip=%s", ip)
         return None
     except Exception as exc:
         logger.warning("ping failed ip=%s error=%s", ip, exc)
@@ -144,37 +207,47 @@ def fetch_ip_metadata():
         ("ipsb", "https://api.ip.sb/geoip", "country_code"),
     ]
 
-    for attempt, (name, url, code_key) in enumerate(
-        random.sample(providers, len(providers)), start=1
-    ):
-        logger.info("querying provider=%s attempt=%d", name, attempt)
-        result = get_json(name, url)
-        if not result:
-            continue
-        j, http_latency_ms, payload_bytes = result
-        try:
-            ip = j["ip"]
-            cc = str(j.get(code_key, "")).upper()
-            logger.info(
-                "provider=%s success ip=%s country=%s attempt=%d http_latency_ms=%.1f payload_bytes=%d",
-                name,
-                ip,
-                cc,
-                attempt,
-                http_latency_ms,
-                payload_bytes,
-            )
-            return {
-                "provider": name,
-                "ip": ip,
-                "country_code": cc,
-                "http_latency_ms": http_latency_ms,
-                "http_payload_bytes": payload_bytes,
-                "attempt": attempt,
-            }
-        except Exception:
-            logger.warning("provider=%s response missing required keys", name)
-            continue
+    random.shuffle(providers)
+    pool = ThreadPoolExecutor(max_workers=len(providers), thread_name_prefix="ip-provider")
+    try:
+        futures = {}
+        for name, url, code_key in providers:
+            logger.info("querying provider=%s", name)
+            futures[pool.submit(get_json, name, url)] = (name, code_key)
+
+        for attempt, future in enumerate(as_completed(futures), start=1):
+            name, code_key = futures[future]
+            result = future.result()
+            if not result:
+                continue
+            j, http_latency_ms, payload_bytes = result
+            try:
+                ip = j["ip"]
+                cc = str(j.get(code_key, "")).upper()
+                logger.info(
+                    "provider=%s success ip=%s country=%s attempt=%d http_latency_ms=%.1f payload_bytes=%d",
+                    name,
+                    ip,
+                    cc,
+                    attempt,
+                    http_latency_ms,
+                    payload_bytes,
+                )
+                # Read-only view so the cached entry can be shared without copying.
+                return types.MappingProxyType({
+                    "provider": name,
+                    "ip": ip,
+                    "country_code": cc,
+                    "http_latency_ms": http_latency_ms,
+                    "http_payload_bytes": payload_bytes,
+                    "attempt": attempt,
+                })
+            except Exception:
+                logger.warning("provider=%s response missing required keys", name)
+                continue
+    finally:
+        # Do not wait for slower providers once a winner is known.
+        pool.shutdown(wait=False, cancel_futures=True)
 
     logger.error("all providers failed to supply public ip data")
     return {}
@@ -189,7 +262,7 @@ def get_ip_data():
     cache_hit = False
 
     if _ip_cache_data and now - _ip_cache_timestamp < CACHE_TTL_SECONDS:
-        metadata = dict(_ip_cache_data)
+        metadata = _ip_cache_data
         cache_hit = True
         logger.info(
             "using cached ip metadata provider=%s cache_age_ms=%.1f",
@@ -202,7 +275,7 @@ def get_ip_data():
         if not metadata:
             logger.error("public ip metadata unavailable")
             return {}
-        _ip_cache_data = dict(metadata)
+        _ip_cache_data = metadata
         _ip_cache_timestamp = now
 
     latency = ping_ip(metadata["ip"])
@@ -229,6 +302,37 @@ def get_ip_data():
     }
 
 
+class IPMetricCollector:
+    def collect(self):
+        data = get_ip_data()
+        if not data:
+            logger.error("/metrics request failed to obtain ip data")
+            return
+
+        logger.info(
+            "/metrics request served provider=%s ip=%s", data["provider"], data["ip"]
+        )
+        ip_info = GaugeMetricFamily(
+            "ip_info",
+            "Public IP info with ping latency",
+            labels=("provider", "country_code"),
+        )
+        ip_info.add_metric((data["provider"], data["country_code"]), data["ping_ms"])
+        yield ip_info
+
+        ip_current_info = GaugeMetricFamily(
+            "ip_current_info",
+            "Current public IP as text in label, stable series",
+            labels=("label", "value"),
+        )
+        ip_current_info.add_metric(("ip_address", data["ip"]), 1)
+        yield ip_current_info
+
+
+registry = CollectorRegistry()
+registry.register(IPMetricCollector())
+
+
 @app.get("/ip")
 def ip_json():
     data = get_ip_data()
@@ -238,24 +342,10 @@ def ip_json():
 
 @app.get("/metrics")
 def metrics():
-    data = get_ip_data()
-    if not data:
-        logger.error("/metrics request failed to obtain ip data")
+    payload = generate_latest(registry)
+    if not payload:
         return Response("", status=502, mimetype="text/plain")
-
-    logger.info(
-        "/metrics request served provider=%s ip=%s", data["provider"], data["ip"]
-    )
-    lines = [
-        "# HELP ip_info Public IP info with ping latency",
-        "# TYPE ip_info gauge",
-        f'ip_info{{provider="{data["provider"]}",country_code="{data["country_code"]}"}} {data["ping_ms"]}',
-        "",
-        "# HELP ip_current_info Current public IP as text in label, stable series",
-        "# TYPE ip_current_info gauge",
-        f'ip_current_info{{label="ip_address",value="{data["ip"]}"}} 1'
-    ]
-    return Response("\n".join(lines) + "\n", mimetype="text/plain")
+    return Response(payload, content_type=CONTENT_TYPE_LATEST)
 
 if __name__ == "__main__":
-    app.run(host="0.0.0.0", port=18002)
+    serve(app, host="0.0.0.0", port=18002, threads=SERVER_THREADS)